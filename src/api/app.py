@@ -1,36 +1,45 @@
 import os
 import sys
-from flask import Flask, render_template_string, request, redirect, url_for
-import json
+from flask import Flask, render_template_string, request, redirect, url_for, jsonify, g
 import logging
 from typing import Dict, Any
 
-# Configure logging
+# Configure logging (this module is the service entrypoint, library modules do not configure logging)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --- FIX for ModuleNotFoundError: No module named 'src' ---
-# This ensures that Python can find modules inside the 'src' directory 
-# when the script is run from the project root.
-# It adds the project root (two levels up) to the system path.
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-
-try:
-    # 🌟 Import the globally instantiated predictor object from your service file
-    from src.service.predictor import predictor, ModelPredictor
-except ImportError as e:
-    logging.error(f"Failed to import ModelPredictor: {e}")
-    predictor = None # Set to None if loading fails
+# Only needed when the script is run directly (python src/api/app.py) from the project root;
+# gunicorn imports 'src.api.app' as a package and does not need the path hack.
+if not __package__:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# 🌟 Only NumPy is imported here; the model itself is loaded on first use, not at import time
+from src.service.predictor import get_predictor, MODEL_ROUTING_FIELD
 
 app = Flask(__name__)
 
+
 # --- Model Status Check ---
-if predictor is None or not isinstance(predictor, ModelPredictor):
-    # If the predictor failed to load, disable the prediction route and log.
-    MODEL_LOAD_ERROR = True
-    logging.error("Model predictor failed to initialize. Prediction service disabled.")
-else:
-    MODEL_LOAD_ERROR = False
-    logging.info("Flask app initialized and ModelPredictor is ready.")
+def current_predictor():
+    """The shared predictor (None if it failed to load), looked up once per request."""
+    if "predictor" not in g:
+        g.predictor = get_predictor()
+    return g.predictor
+
+
+def model_load_error() -> bool:
+    """True if the predictor failed to initialize (prediction route disabled)."""
+    return current_predictor() is None
+
+
+@app.context_processor
+def inject_model_names():
+    """Registered model names for the wine type selector of the form."""
+    predictor = current_predictor()
+    return {
+        "model_names": predictor.model_names if predictor else [],
+        "routing_field": MODEL_ROUTING_FIELD,
+    }
 
 # --- HTML TEMPLATE (Includes Tailwind CSS for styling) ---
 # NOTE: The HTML is served as a string for simplicity in deployment
@@ -79,6 +88,18 @@ HTML_TEMPLATE = """
             {% endif %}
 
             <form method="POST" action="/predict" class="space-y-4">
+                {% if model_names|length > 1 %}
+                <div>
+                    <label for="{{ routing_field }}" class="block text-sm font-medium text-gray-700">Wine type:</label>
+                    <select id="{{ routing_field }}" name="{{ routing_field }}"
+                            class="mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:outline-none focus:ring-red-500 focus:border-red-500 sm:text-sm">
+                        {% for name in model_names %}
+                        <option value="{{ name }}">{{ name }}</option>
+                        {% endfor %}
+                    </select>
+                </div>
+                {% endif %}
+
                 <p class="text-gray-600 mb-4">Enter the 11 chemical properties of the wine:</p>
                 
                 <div class="grid grid-cols-2 gap-4">
@@ -101,7 +122,7 @@ HTML_TEMPLATE = """
             
             {% if model_error %}
                 <p class="text-center text-red-500 mt-4 text-xs font-semibold">
-                    [ERROR] Model failed to load. Please check artifacts/models/final_model.pkl path.
+                    [ERROR] Model failed to load. Please check the models/final_model.npz path.
                 </p>
             {% endif %}
         </div>
@@ -133,13 +154,14 @@ def index():
         features=INPUT_FEATURES, 
         result=None, 
         error_message=None,
-        model_error=MODEL_LOAD_ERROR
+        model_error=model_load_error()
     )
 
 @app.route('/predict', methods=['POST'])
 def handle_prediction():
     """Handles form submission, processes data, and returns prediction."""
     
+    MODEL_LOAD_ERROR = model_load_error()
     if MODEL_LOAD_ERROR:
         return render_template_string(
             HTML_TEMPLATE, 
@@ -181,13 +203,14 @@ def handle_prediction():
             model_error=MODEL_LOAD_ERROR
         )
 
-    logging.info(f"Received prediction request with data: {json.dumps(input_data)}")
-    
+    # Route to the registered model for this wine type (the default model if not given)
+    if request.form.get(MODEL_ROUTING_FIELD):
+        input_data[MODEL_ROUTING_FIELD] = request.form[MODEL_ROUTING_FIELD]
+
     try:
-        # Call the globally loaded predictor object
-        prediction_result = predictor.predict(input_data)
-        
-        logging.info(f"Prediction made: {prediction_result}")
+        # Call the shared (lazily loaded) predictor object.
+        # Inputs, features and the result go to the audit trail (src/service/audit.py), not the text log.
+        prediction_result = current_predictor().predict(input_data)
 
         # Redirect back to the index page with the result in the query string
         return render_template_string(
@@ -209,6 +232,14 @@ def handle_prediction():
         )
 
 
+@app.route('/stats', methods=['GET'])
+def serving_stats():
+    """Returns serving statistics (e.g. cascade escalation rate and latency saved) as JSON."""
+    if model_load_error():
+        return jsonify({"error": "Model Artifacts Missing/Failed to Load."}), 503
+    return jsonify(current_predictor().stats())
+
+
 if __name__ == '__main__':
     # To run the development server:
     # Navigate to the project root directory
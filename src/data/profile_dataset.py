@@ -0,0 +1,387 @@
+#importing Libraries..
+import io
+import os
+import sys
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.service.runtime import DERIVED_FEATURES
+
+
+#configure file Paths and values
+RAW_DATA_PATH = "data/raw/winequality-red.csv"
+PROFILE_PATH = "artifacts/results/data_profile.json"
+SEP = ";"
+TARGET = "quality"
+TARGET_THRESHOLD = 6          # quality >= 6 is HIGH quality (same split as traget_remodeling_util)
+BLOCK_BYTES = 32 * 1024 * 1024  # bytes parsed at a time by one worker (bounds memory per worker)
+RANGES_PER_WORKER = 4
+HISTOGRAM_BINS = 20
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+SKETCH_RELATIVE_ACCURACY = 0.001
+EXACT_DISTINCT_LIMIT = 2048
+
+
+class MomentAccumulator:
+    """
+    Count, mean, central moments M2..M4, min, max and missing count of every column.
+    Blocks are merged with the pairwise update formulas of Chan et al. / Pebay, so the
+    result does not depend on how the file was split.
+    """
+    def __init__(self, n_columns: int):
+        self.n = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.m3 = np.zeros(n_columns)
+        self.m4 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+        self.missing = np.zeros(n_columns)
+
+    def update(self, block: np.ndarray):
+        other = MomentAccumulator(block.shape[1])
+        valid = ~np.isnan(block)
+        other.n = valid.sum(axis=0).astype(np.float64)
+        other.missing = (~valid).sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            other.mean = np.where(other.n > 0, np.nansum(block, axis=0) / other.n, 0.0)
+        delta = np.where(valid, block - other.mean, 0.0)
+        other.m2 = (delta ** 2).sum(axis=0)
+        other.m3 = (delta ** 3).sum(axis=0)
+        other.m4 = (delta ** 4).sum(axis=0)
+        other.min = np.where(valid, block, np.inf).min(axis=0, initial=np.inf)
+        other.max = np.where(valid, block, -np.inf).max(axis=0, initial=-np.inf)
+        self.merge(other)
+
+    def merge(self, other: "MomentAccumulator"):
+        na, nb = self.n, other.n
+        n = na + nb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = other.mean - self.mean
+            mean = np.where(n > 0, self.mean + delta * nb / n, 0.0)
+            m2 = self.m2 + other.m2 + np.where(n > 0, delta ** 2 * na * nb / n, 0.0)
+            m3 = (self.m3 + other.m3
+                  + np.where(n > 0, delta ** 3 * na * nb * (na - nb) / n ** 2
+                             + 3 * delta * (na * other.m2 - nb * self.m2) / n, 0.0))
+            m4 = (self.m4 + other.m4
+                  + np.where(n > 0, delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+                             + 6 * delta ** 2 * (na ** 2 * other.m2 + nb ** 2 * self.m2) / n ** 2
+                             + 4 * delta * (na * other.m3 - nb * self.m3) / n, 0.0))
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, mean, m2, m3, m4
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.missing = self.missing + other.missing
+
+    def summary(self, i: int) -> Dict:
+        n = self.n[i]
+        variance = self.m2[i] / (n - 1) if n > 1 else 0.0
+        # Bias-corrected sample skewness and excess kurtosis (same definitions as pandas)
+        skewness = kurtosis = 0.0
+        if n > 3 and self.m2[i] > 0:
+            g1 = (self.m3[i] / n) / (self.m2[i] / n) ** 1.5
+            g2 = (self.m4[i] / n) / (self.m2[i] / n) ** 2 - 3.0
+            skewness = g1 * (n * (n - 1)) ** 0.5 / (n - 2)
+            kurtosis = ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+        return {
+            "count": int(n),
+            "missing": int(self.missing[i]),
+            "mean": self.mean[i] if n > 0 else None,
+            "std": variance ** 0.5,
+            "variance": variance,
+            "skewness": skewness,
+            "kurtosis": kurtosis,
+            "min": self.min[i] if n > 0 else None,
+            "max": self.max[i] if n > 0 else None,
+        }
+
+
+class CoMomentAccumulator:
+    """Co-moment matrix of the complete rows, merged pairwise; gives the full correlation matrix."""
+    def __init__(self, n_columns: int):
+        self.n = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, block: np.ndarray):
+        block = block[~np.isnan(block).any(axis=1)]
+        if len(block) == 0:
+            return
+        other = CoMomentAccumulator(block.shape[1])
+        other.n = len(block)
+        other.mean = block.mean(axis=0)
+        centered = block - other.mean
+        other.comoment = centered.T @ centered
+        self.merge(other)
+
+    def merge(self, other: "CoMomentAccumulator"):
+        n = self.n + other.n
+        if n == 0:
+            return
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.n * other.n / n
+        self.mean = self.mean + delta * other.n / n
+        self.n = n
+
+    def correlation(self) -> np.ndarray:
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = self.comoment / np.outer(std, std)
+        return np.where(np.isfinite(corr), corr, 0.0)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with logarithmic buckets (as in DDSketch): every quantile
+    is within SKETCH_RELATIVE_ACCURACY of the true value, whatever the number of rows.
+    Bucket counts add up on merge, and the histogram is derived from the same buckets,
+    so no second pass is needed to find the value range.
+
+    While a column has at most EXACT_DISTINCT_LIMIT distinct values (typical for
+    measurements recorded at fixed precision) the exact value counts are kept as well,
+    and quantiles and histograms are exact.
+    """
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive: Counter = Counter()
+        self.negative: Counter = Counter()
+        self.zero = 0
+        self.exact: Optional[Counter] = Counter()
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        self.zero += int(np.count_nonzero(values == 0))
+        for store, part in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if len(part):
+                keys, counts = np.unique(np.ceil(np.log(part) / self.log_gamma).astype(np.int64), return_counts=True)
+                store.update(dict(zip(keys.tolist(), counts.tolist())))
+        if self.exact is not None:
+            keys, counts = np.unique(values, return_counts=True)
+            self.exact.update(dict(zip(keys.tolist(), counts.tolist())))
+            self._check_exact()
+
+    def merge(self, other: "QuantileSketch"):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero += other.zero
+        if self.exact is not None and other.exact is not None:
+            self.exact.update(other.exact)
+            self._check_exact()
+        else:
+            self.exact = None
+
+    def _check_exact(self):
+        if len(self.exact) > EXACT_DISTINCT_LIMIT:
+            self.exact = None
+
+    def _buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(value, count) of every bucket, in increasing value order."""
+        if self.exact is not None:
+            items = sorted(self.exact.items())
+            return np.array([v for v, _ in items], dtype=np.float64), np.array([c for _, c in items], dtype=np.int64)
+
+        def value(key):
+            return 2 * self.gamma ** key / (self.gamma + 1)
+        negative = sorted(self.negative.items(), reverse=True)
+        positive = sorted(self.positive.items())
+        values = [-value(k) for k, _ in negative] + ([0.0] if self.zero else []) + [value(k) for k, _ in positive]
+        counts = [c for _, c in negative] + ([self.zero] if self.zero else []) + [c for _, c in positive]
+        return np.array(values, dtype=np.float64), np.array(counts, dtype=np.int64)
+
+    def quantiles(self, qs: List[float], lo: float, hi: float) -> Dict[str, float]:
+        """Quantiles with linear interpolation between ranks (as pandas.Series.quantile)."""
+        values, counts = self._buckets()
+        if counts.sum() == 0:
+            return {}
+        cumulative = np.cumsum(counts)
+        ranks = np.array(qs) * (cumulative[-1] - 1)
+        below = values[np.searchsorted(cumulative, np.floor(ranks), side="right")]
+        above = values[np.searchsorted(cumulative, np.ceil(ranks), side="right")]
+        picked = below + (above - below) * (ranks - np.floor(ranks))
+        return {str(q): float(np.clip(v, lo, hi)) for q, v in zip(qs, picked)}
+
+    def histogram(self, lo: float, hi: float, bins: int = HISTOGRAM_BINS) -> Dict[str, List]:
+        """Equal-width histogram over [lo, hi] (last bin closed, as numpy.histogram)."""
+        values, counts = self._buckets()
+        edges = np.linspace(lo, hi, bins + 1) if hi > lo else np.array([lo, lo + 1.0])
+        index = np.clip(np.searchsorted(edges, np.clip(values, lo, hi), side="right") - 1, 0, len(edges) - 2)
+        hist = np.zeros(len(edges) - 1, dtype=np.int64)
+        np.add.at(hist, index, counts)
+        return {"edges": edges.tolist(), "counts": hist.tolist()}
+
+
+class DatasetProfile:
+    """All accumulators of one part of the file; profiles of different parts merge into one."""
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.rows = 0
+        self.target_index = columns.index(TARGET) if TARGET in columns else None
+        self.moments = MomentAccumulator(len(columns))
+        self.comoments = CoMomentAccumulator(len(columns))
+        self.sketches = [QuantileSketch() for _ in columns]
+        self.class_moments: Dict[int, MomentAccumulator] = {}
+        self.class_sketches: Dict[int, List[QuantileSketch]] = {}
+
+    def update(self, block: np.ndarray):
+        self.rows += len(block)
+        self.moments.update(block)
+        self.comoments.update(block)
+        for sketch, column in zip(self.sketches, block.T):
+            sketch.update(column)
+        if self.target_index is None:
+            return
+        labels = np.where(block[:, self.target_index] >= TARGET_THRESHOLD, 1, 0)
+        for label in (0, 1):
+            rows = block[labels == label]
+            if len(rows) == 0:
+                continue
+            self.class_moments.setdefault(label, MomentAccumulator(len(self.columns))).update(rows)
+            sketches = self.class_sketches.setdefault(label, [QuantileSketch() for _ in self.columns])
+            for sketch, column in zip(sketches, rows.T):
+                sketch.update(column)
+
+    def merge(self, other: "DatasetProfile"):
+        self.rows += other.rows
+        self.moments.merge(other.moments)
+        self.comoments.merge(other.comoments)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        for label, moments in other.class_moments.items():
+            if label not in self.class_moments:
+                self.class_moments[label] = moments
+                self.class_sketches[label] = other.class_sketches[label]
+                continue
+            self.class_moments[label].merge(moments)
+            for sketch, other_sketch in zip(self.class_sketches[label], other.class_sketches[label]):
+                sketch.merge(other_sketch)
+
+    def _column_stats(self, moments: MomentAccumulator, sketches: List[QuantileSketch], histogram: bool) -> Dict:
+        stats = {}
+        for i, name in enumerate(self.columns):
+            column = moments.summary(i)
+            if column["count"]:
+                column["quantiles"] = sketches[i].quantiles(QUANTILES, column["min"], column["max"])
+                if histogram:
+                    column["histogram"] = sketches[i].histogram(column["min"], column["max"])
+            stats[name] = column
+        return stats
+
+    def to_dict(self) -> Dict:
+        profile = {
+            "rows": self.rows,
+            "columns": self._column_stats(self.moments, self.sketches, histogram=True),
+            "correlation": {
+                "columns": self.columns,
+                "rows_used": int(self.comoments.n),
+                "matrix": self.comoments.correlation().tolist(),
+            },
+        }
+        if self.target_index is not None:
+            class_counts = {str(label): int(m.n[self.target_index]) for label, m in sorted(self.class_moments.items())}
+            total = sum(class_counts.values())
+            profile["target"] = {
+                "column": TARGET,
+                "threshold": TARGET_THRESHOLD,
+                "class_counts": class_counts,
+                "class_balance": {label: count / total for label, count in class_counts.items()},
+            }
+            profile["per_class"] = {
+                str(label): self._column_stats(moments, self.class_sketches[label], histogram=False)
+                for label, moments in sorted(self.class_moments.items())
+            }
+        return profile
+
+
+#Reading the header and splitting the file into line-aligned byte ranges
+def read_columns(path: str, sep: str = SEP) -> Tuple[List[str], int]:
+    with open(path, "rb") as f:
+        header = f.readline()
+        return [c.strip().strip('"') for c in header.decode().strip().split(sep)], f.tell()
+
+
+def _align(f, offset: int) -> int:
+    """First line start at or after offset."""
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def split_ranges(path: str, start: int, n_ranges: int) -> List[Tuple[int, int]]:
+    size = os.path.getsize(path)
+    bounds = np.linspace(start, size, n_ranges + 1).astype(np.int64).tolist()
+    with open(path, "rb") as f:
+        aligned = [start] + [_align(f, b) for b in bounds[1:-1]] + [size]
+    return [(a, b) for a, b in zip(aligned[:-1], aligned[1:]) if b > a]
+
+
+def _with_derived_columns(block: np.ndarray, columns: List[str]) -> np.ndarray:
+    # Engineered columns are profiled too (computed as in serving), so the profile covers the model's input features
+    derived = [block[:, columns.index(a)] + block[:, columns.index(b)] for a, b in DERIVED_FEATURES.values()]
+    return np.column_stack([block] + derived) if derived else block
+
+
+#Profiling one byte range (runs in a worker process)
+def profile_range(path: str, byte_range: Tuple[int, int], columns: List[str], sep: str = SEP) -> DatasetProfile:
+    start, end = byte_range
+    profile = DatasetProfile(columns + list(DERIVED_FEATURES))
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            data = f.read(min(BLOCK_BYTES, end - f.tell()))
+            if f.tell() < end:
+                data += f.readline()  # complete the last line of the block
+            block = pd.read_csv(io.BytesIO(data), sep=sep, header=None, names=columns,
+                                dtype=np.float64).to_numpy()
+            profile.update(_with_derived_columns(block, columns))
+    return profile
+
+
+#Main Processing function
+def profile_dataset(path: str = RAW_DATA_PATH, output_path: str = PROFILE_PATH,
+                    workers: Optional[int] = None) -> Dict:
+    workers = workers or os.cpu_count() or 1
+    columns, data_start = read_columns(path)
+    ranges = split_ranges(path, data_start, workers * RANGES_PER_WORKER)
+    logging.info(f"Profiling {path} ({os.path.getsize(path)} bytes) in {len(ranges)} ranges on {workers} workers")
+
+    profile = DatasetProfile(columns + list(DERIVED_FEATURES))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(profile_range, [path] * len(ranges), ranges, [columns] * len(ranges)):
+            profile.merge(part)
+
+    result = {"source": path, **profile.to_dict()}
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(_compact(result), f, separators=(",", ":"))
+    logging.info(f"Profiled {result['rows']} rows, saved profile into {output_path}")
+    return result
+
+
+def load_profile(path: str = PROFILE_PATH) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _compact(value):
+    """Rounds floats to 6 significant digits to keep the JSON small."""
+    if isinstance(value, dict):
+        return {k: _compact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_compact(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return float(f"{value:.6g}")
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+#Runner function:
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format ='%(asctime)s - %(levelname)s - %(message)s')
+    profile_dataset(*sys.argv[1:3])
@@ -1,7 +1,11 @@
 import os
+import json
 import joblib
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
 import logging
 import pandas as pd
 
@@ -14,6 +18,11 @@ logging.basicConfig(
 #setting file paths
 DATA_PATH = "data/final"
 MODEL_PATH = "models/final_model.joblib"
+# Cheap first-stage model for cascade serving (src/service/cascade.py)
+FAST_MODEL_PATH = "models/fast_model.joblib"
+# Dataset profile written by src/data/profile_dataset.py, reused as the drift reference of the model
+PROFILE_PATH = "artifacts/results/data_profile.json"
+DRIFT_REFERENCE_PATH = "models/drift_reference.json"
 
 
 # ---------------- Load Data ----------------
@@ -34,10 +43,43 @@ def train(X_train,y_train):
     logging.info(f"Model Trainingf Complete and saved in {MODEL_PATH}")
 
 
+#----------------- Train Fast Model --------------
+def train_fast(X_train,y_train):
+    logging.info("Started Fast Model Training")
+    model = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))
+    model.fit(X_train,y_train.squeeze())
+    joblib.dump(model,FAST_MODEL_PATH)
+    logging.info(f"Fast Model Training Complete and saved in {FAST_MODEL_PATH}")
+
+
+#----------------- Save Drift Reference --------------
+def save_drift_reference(feature_cols):
+    if not os.path.exists(PROFILE_PATH):
+        logging.warning(f"No dataset profile at {PROFILE_PATH}, skipping drift reference (run src/data/profile_dataset.py)")
+        return
+    with open(PROFILE_PATH) as f:
+        profile = json.load(f)
+    # Keep the statistics of the model's input features and the class balance only
+    reference = {
+        "source": profile["source"],
+        "rows": profile["rows"],
+        "features": {col: profile["columns"][col] for col in feature_cols},
+        "target": profile.get("target"),
+    }
+    with open(DRIFT_REFERENCE_PATH, "w") as f:
+        json.dump(reference, f, separators=(",", ":"))
+    logging.info(f"Drift reference saved in {DRIFT_REFERENCE_PATH}")
+
+
 #------------RUN TRAIN MODEL-----------------
 if __name__ == "__main__":
     X_train,y_train = load_data()
     train(
         X_train=X_train,
         y_train=y_train
-    )
\ No newline at end of file
+    )
+    train_fast(
+        X_train=X_train,
+        y_train=y_train
+    )
+    save_drift_reference(feature_cols=X_train.columns)
\ No newline at end of file
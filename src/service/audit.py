@@ -0,0 +1,427 @@
+# --- src/service/audit.py ---
+# Prediction audit trail: an in-memory buffer on the request path, flushed in
+# background batches to append-only, compressed columnar segment files.
+#
+# Layout:  <AUDIT_LOG_DIR>/date=YYYY-MM-DD/
+#              open-<host>-<pid>-<token>/rg-<first_ms>-<last_ms>-<seq>.npz     (segment being written)
+#              segment-<first_ms>-<last_ms>-<host>-<pid>-<token>.npz            (sealed segment)
+# Each process keeps one open segment and appends every flushed batch to it as a
+# row-group file. The segment is sealed (its row groups compacted into one compressed
+# .npz) when it reaches MAX_SEGMENT_ROWS, MAX_SEGMENT_BYTES or MAX_SEGMENT_AGE_SECONDS,
+# at midnight (UTC) and when the process exits. Every column is a separate member of
+# the .npz, so readers only decompress the columns they ask for, and the timestamps in
+# the directory and file names let scans skip whole segments.
+import os
+import math
+import time
+import uuid
+import atexit
+import shutil
+import socket
+import logging
+import threading
+from collections import deque
+from itertools import groupby
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+AUDIT_LOG_DIR = os.environ.get("AUDIT_LOG_DIR", os.path.join('logs', 'audit'))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("AUDIT_FLUSH_INTERVAL_SECONDS", "2.0"))
+MAX_SEGMENT_ROWS = 250_000
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+MAX_SEGMENT_AGE_SECONDS = 3600.0
+# Records beyond this many waiting for the writer are dropped (and counted), so a slow
+# or full disk cannot grow the serving process' memory without limit
+MAX_BUFFERED_RECORDS = 100_000
+# Open segments are owned by (host, pid): several hosts may share AUDIT_LOG_DIR, but only
+# segments of dead processes on this host are ever recovered. '-' separates name fields.
+HOSTNAME = socket.gethostname().replace("-", "_") or "localhost"
+
+# Every segment has the columns timestamp, model_version, probability, prediction and
+# latency_ms, plus one column per raw input (numeric, or text for non-numeric inputs such
+# as the wine_type routing field) and per engineered feature:
+INPUT_PREFIX = "input:"
+FEATURE_PREFIX = "feature:"
+
+
+class _OpenSegment:
+    """The segment a process is currently appending row groups to."""
+    def __init__(self, partition: str, day: str):
+        self.day = day
+        self.token = uuid.uuid4().hex[:12]
+        self.path = os.path.join(partition, f"open-{HOSTNAME}-{os.getpid()}-{self.token}")
+        self.opened_at = time.monotonic()
+        self.row_groups = 0
+        self.rows = 0
+        self.bytes = 0
+        os.makedirs(self.path)
+
+
+class AuditSink:
+    """
+    Buffers prediction records and writes them from a background thread.
+
+    record() only appends a tuple to a deque (atomic under the GIL, no lock taken),
+    so the request path never waits for compression or disk I/O.
+    """
+    def __init__(self, directory: str = AUDIT_LOG_DIR, flush_interval: float = FLUSH_INTERVAL_SECONDS,
+                 max_segment_rows: int = MAX_SEGMENT_ROWS, max_segment_bytes: int = MAX_SEGMENT_BYTES,
+                 max_segment_age: float = MAX_SEGMENT_AGE_SECONDS, max_buffered: int = MAX_BUFFERED_RECORDS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_segment_rows = max_segment_rows
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.max_buffered = max_buffered
+        self._buffer: deque = deque()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._segment: Optional[_OpenSegment] = None
+        self.rows_written = 0
+        self.segments_sealed = 0
+        self.write_errors = 0
+        self.dropped = 0
+        self._dropped_logged = 0
+        atexit.register(self.close)
+
+    def record(self, inputs: Dict[str, Any], feature_names: Sequence[str], features: np.ndarray,
+               model_version: str, probability: float, prediction: int, latency_seconds: float):
+        """Enqueues one prediction for the audit trail (dropped and counted if the buffer is full)."""
+        # The writer thread is (re)started per process, so forked gunicorn workers get their own
+        if self._pid != os.getpid():
+            self._start()
+        if len(self._buffer) >= self.max_buffered:
+            self.dropped += 1
+            return
+        self._buffer.append(
+            (time.time(), inputs, feature_names, features, model_version, probability, prediction, latency_seconds)
+        )
+
+    def _start(self):
+        with self._flush_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent's buffered records and open segment are the parent's
+                self._buffer = deque()
+                self._segment = None
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        # Recovery re-reads and compresses whole segments, so it runs here and never on the
+        # request path; holding the lock keeps it off the segment this process is writing
+        with self._flush_lock:
+            try:
+                recover_open_segments(self.directory)
+            except Exception as e:
+                logging.error(f"Failed to recover open audit segments: {e}", exc_info=True)
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Appends everything buffered so far to the open segment, sealing it when it is due."""
+        with self._flush_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.max_segment_rows:
+                    batch.append(self._buffer.popleft())
+                # A segment never spans two date partitions
+                for day, records in groupby(batch, key=lambda entry: _day(entry[0])):
+                    records = list(records)
+                    try:
+                        self._append(day, records)
+                    except Exception as e:
+                        self.write_errors += 1
+                        logging.error(f"Failed to write audit records ({len(records)} records lost): {e}", exc_info=True)
+            if self._segment is not None and time.monotonic() - self._segment.opened_at >= self.max_segment_age:
+                self._seal()
+            if self.dropped > self._dropped_logged:
+                logging.warning(f"Audit buffer full: {self.dropped - self._dropped_logged} records dropped.")
+                self._dropped_logged = self.dropped
+
+    def close(self):
+        self._stop.set()
+        if self._pid == os.getpid():
+            self.flush()
+            with self._flush_lock:
+                self._seal()
+
+    def _append(self, day: str, batch: List[tuple]):
+        if self._segment is not None and self._segment.day != day:
+            self._seal()
+        if self._segment is None:
+            self._segment = _OpenSegment(os.path.join(self.directory, f"date={day}"), day)
+
+        segment = self._segment
+        columns = _batch_columns(batch)
+        first_ms, last_ms = _bounds_ms(columns["timestamp"])
+        name = f"rg-{first_ms}-{last_ms}-{segment.row_groups:06d}.npz"
+        # Row groups are small and short-lived, so they are stored uncompressed; sealing compresses
+        segment.bytes += _write_atomic(os.path.join(segment.path, name), columns, compress=False)
+        segment.row_groups += 1
+        segment.rows += len(batch)
+        self.rows_written += len(batch)
+
+        if segment.rows >= self.max_segment_rows or segment.bytes >= self.max_segment_bytes:
+            self._seal()
+
+    def _seal(self):
+        if self._segment is None:
+            return
+        segment, self._segment = self._segment, None
+        try:
+            seal_segment(segment.path)
+            self.segments_sealed += 1
+        except Exception as e:
+            self.write_errors += 1
+            logging.error(f"Failed to seal audit segment {segment.path} (left open for recovery): {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "buffered": len(self._buffer),
+            "dropped": self.dropped,
+            "rows_written": self.rows_written,
+            "segments_sealed": self.segments_sealed,
+            "open_segment_rows": self._segment.rows if self._segment is not None else 0,
+            "write_errors": self.write_errors,
+        }
+
+
+def _batch_columns(batch: List[tuple]) -> Dict[str, np.ndarray]:
+    columns: Dict[str, np.ndarray] = {
+        "timestamp": np.array([entry[0] for entry in batch], dtype=np.float64),
+        "model_version": np.array([entry[4] for entry in batch]),
+        "probability": np.array([entry[5] for entry in batch], dtype=np.float64),
+        "prediction": np.array([entry[6] for entry in batch], dtype=np.int8),
+        "latency_ms": np.array([entry[7] * 1000.0 for entry in batch], dtype=np.float32),
+    }
+
+    # One column per raw input and per engineered feature; missing values are NaN ("" in text columns)
+    input_names = sorted({name for entry in batch for name in entry[1]})
+    for name in input_names:
+        values = [entry[1].get(name) for entry in batch]
+        try:
+            columns[INPUT_PREFIX + name] = np.array(
+                [np.nan if value is None else float(value) for value in values], dtype=np.float64
+            )
+        except (TypeError, ValueError):
+            columns[INPUT_PREFIX + name] = np.array(["" if value is None else str(value) for value in values])
+    features = [dict(zip(entry[2], entry[3])) for entry in batch]
+    for name in dict.fromkeys(name for entry in batch for name in entry[2]):
+        columns[FEATURE_PREFIX + name] = np.array(
+            [row.get(name, np.nan) for row in features], dtype=np.float64
+        )
+    return columns
+
+
+def _write_atomic(path: str, columns: Dict[str, np.ndarray], compress: bool) -> int:
+    """Writes to a temporary name and renames, so readers never see a partial file. Returns its size."""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    with open(tmp_path, "wb") as f:
+        (np.savez_compressed if compress else np.savez)(f, **columns)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def _concat_columns(parts: List[Dict[str, np.ndarray]], names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Concatenates column dicts; a column absent from a part is NaN ("" for text columns)
+    for that part's rows. A column stored as text in any part is returned as text.
+    """
+    if names is None:
+        names = list(dict.fromkeys(n for part in parts for n in part))
+    result: Dict[str, np.ndarray] = {}
+    for name in names:
+        text = any(part[name].dtype.kind in "US" for part in parts if name in part)
+        fill = "" if text else np.nan
+        pieces = [part[name] if name in part else np.full(len(part["timestamp"]), fill) for part in parts]
+        if text:
+            pieces = [piece.astype(str) for piece in pieces]
+        if pieces:
+            result[name] = np.concatenate(pieces)
+    return result
+
+
+def seal_segment(open_path: str) -> Optional[str]:
+    """Compacts the row groups of an open segment into one compressed sealed segment."""
+    row_groups = sorted(f for f in os.listdir(open_path) if f.startswith("rg-") and f.endswith(".npz"))
+    if row_groups:
+        parts = []
+        for filename in row_groups:
+            with np.load(os.path.join(open_path, filename), allow_pickle=False) as row_group:
+                parts.append({key: row_group[key] for key in row_group.files})
+        columns = _concat_columns(parts)
+        first_ms, last_ms = _bounds_ms(columns["timestamp"])
+        host, pid, token = os.path.basename(open_path).split("-")[-3:]
+        sealed_path = os.path.join(os.path.dirname(open_path), f"segment-{first_ms}-{last_ms}-{host}-{pid}-{token}.npz")
+        _write_atomic(sealed_path, columns, compress=True)
+    else:
+        sealed_path = None
+    # The sealed file exists before the row groups go away, so no record is ever missing
+    shutil.rmtree(open_path, ignore_errors=True)
+    return sealed_path
+
+
+def recover_open_segments(directory: str = AUDIT_LOG_DIR):
+    """
+    Seals segments left open by processes of this host that are no longer running (e.g.
+    after a crash). Other hosts' segments are left alone: their liveness cannot be checked here.
+    """
+    if not os.path.isdir(directory):
+        return
+    for partition in os.listdir(directory):
+        partition_path = os.path.join(directory, partition)
+        if not partition.startswith("date=") or not os.path.isdir(partition_path):
+            continue
+        for name in os.listdir(partition_path):
+            # open-<host>-<pid>-<token>, or recover-<host>-<pid>-open-... if a recovery was interrupted
+            if not name.startswith(("open-", "recover-")):
+                continue
+            _, host, pid = name.split("-")[:3]
+            if host != HOSTNAME or (int(pid) != os.getpid() and _pid_alive(int(pid))):
+                continue
+            # Claim it with an atomic rename, so concurrent workers do not both recover it
+            original = name[name.index("open-"):]
+            claimed = os.path.join(partition_path, f"recover-{HOSTNAME}-{os.getpid()}-{original}")
+            try:
+                os.rename(os.path.join(partition_path, name), claimed)
+            except OSError:
+                continue
+            try:
+                seal_segment(claimed)
+                logging.info(f"Recovered audit segment {original} in {partition_path}")
+            except Exception as e:
+                logging.error(f"Failed to recover audit segment {claimed}: {e}", exc_info=True)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _bounds_ms(timestamps: np.ndarray):
+    """(first, last) timestamp in whole milliseconds, rounded outwards so the range covers every record."""
+    return int(math.floor(timestamps.min() * 1000)), int(math.ceil(timestamps.max() * 1000))
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _segment_bounds(filename: str):
+    """(first, last) timestamp in seconds encoded in a segment or row-group file name."""
+    _, first_ms, last_ms = filename.split("-")[:3]
+    return int(first_ms) / 1000.0, int(last_ms) / 1000.0
+
+
+def list_segments(directory: str = AUDIT_LOG_DIR, start: Optional[float] = None,
+                  end: Optional[float] = None) -> List[str]:
+    """
+    Paths (oldest first) of the sealed segments, and of the row groups of still open
+    segments, that may contain records with start <= timestamp <= end.
+    """
+    if not os.path.isdir(directory):
+        return []
+    start_day = _day(start) if start is not None else None
+    end_day = _day(end) if end is not None else None
+
+    def in_range(filename):
+        first, last = _segment_bounds(filename)
+        return not ((start is not None and last < start) or (end is not None and first > end)), first
+
+    paths = []
+    for partition in sorted(os.listdir(directory)):
+        if not partition.startswith("date="):
+            continue
+        day = partition[len("date="):]
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+        partition_path = os.path.join(directory, partition)
+        names = os.listdir(partition_path)
+        sealed = {n[:-len(".npz")].split("-")[-1] for n in names
+                  if n.startswith("segment-") and n.endswith(".npz")}
+        for name in names:
+            if name.startswith("segment-") and name.endswith(".npz"):
+                keep, first = in_range(name)
+                if keep:
+                    paths.append((first, os.path.join(partition_path, name)))
+            elif name.startswith(("open-", "recover-")):
+                # Skip open segments whose sealed copy already exists (sealing in progress)
+                if name.split("-")[-1] in sealed:
+                    continue
+                open_path = os.path.join(partition_path, name)
+                try:
+                    row_groups = os.listdir(open_path)
+                except FileNotFoundError:
+                    continue
+                for filename in row_groups:
+                    if filename.startswith("rg-") and filename.endswith(".npz"):
+                        keep, first = in_range(filename)
+                        if keep:
+                            paths.append((first, os.path.join(open_path, filename)))
+    return [path for _, path in sorted(paths)]
+
+
+def scan_segments(directory: str = AUDIT_LOG_DIR, columns: Optional[Sequence[str]] = None,
+                  start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yields one dict of column arrays per segment (or open row group), decompressing only
+    the requested columns (all columns if None). Columns missing from a segment are skipped.
+    """
+    for path in list_segments(directory, start, end):
+        try:
+            segment = np.load(path, allow_pickle=False)
+        except FileNotFoundError:
+            # An open row group that was compacted after listing; its records are in the
+            # sealed segment, which the next scan will see
+            continue
+        with segment:
+            wanted = segment.files if columns is None else [c for c in columns if c in segment.files]
+            if start is not None or end is not None:
+                timestamps = segment["timestamp"]
+                mask = np.ones(len(timestamps), dtype=bool)
+                if start is not None:
+                    mask &= timestamps >= start
+                if end is not None:
+                    mask &= timestamps <= end
+                yield {name: segment[name][mask] for name in wanted}
+            else:
+                yield {name: segment[name] for name in wanted}
+
+
+def read_audit_log(directory: str = AUDIT_LOG_DIR, columns: Optional[Sequence[str]] = None,
+                   start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    Concatenates scan_segments() into one dict of columns, e.g. for retraining or drift analysis:
+        pd.DataFrame(read_audit_log(columns=["timestamp", "probability", "feature:alcohol"]))
+    Columns absent from some segments are filled with NaN ("" for text columns) for those rows.
+    """
+    # 'timestamp' is always read so that segments lacking a requested column still report their row count
+    scan_columns = None if columns is None else list(dict.fromkeys(list(columns) + ["timestamp"]))
+    parts = list(scan_segments(directory, scan_columns, start, end))
+    return _concat_columns(parts, columns)
+
+
+# --- Shared sink for the serving process ---
+_audit_sink: Optional[AuditSink] = None
+
+
+def get_audit_sink() -> AuditSink:
+    global _audit_sink
+    if _audit_sink is None:
+        _audit_sink = AuditSink()
+    return _audit_sink
@@ -0,0 +1,216 @@
+# --- src/service/cascade.py ---
+# Cascade serving: the cheap model scores every request and only samples whose
+# probability falls inside the uncertainty band are escalated to the RandomForest.
+#
+# Calibrate the band on X_test.csv (from the project root):
+#   python -m src.service.cascade
+#   CASCADE_TARGET_AGREEMENT=0.995 python -m src.service.cascade
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.service.runtime import load_model_arrays
+from src.service.model_export import FAST_MODEL_ARRAYS_PATH, MODEL_ARRAYS_PATH, X_TEST_PATH
+
+CASCADE_CONFIG_PATH = os.path.join('models', 'cascade.json')
+# Minimum fraction of X_test predictions the cascade must share with the forest alone
+TARGET_AGREEMENT = float(os.environ.get("CASCADE_TARGET_AGREEMENT", "0.99"))
+# Below this many live escalations, the full-model cost measured by calibrate() is used
+# to estimate the latency saved (the live per-sample cost is too noisy, or unknown)
+MIN_LIVE_ESCALATIONS = 100
+# Rows timed one at a time by calibrate() to measure the full model's per-request cost
+COST_SAMPLE_ROWS = 200
+
+
+class CascadeModel:
+    """
+    Two-stage model with the same interface as the runtime model arrays
+    (feature_names, classes, predict_proba, predict), so ModelPredictor can serve it as-is.
+
+    A sample is escalated to the full model when low < P(class 1) < high.
+    """
+    kind = "cascade"
+
+    def __init__(self, fast_model: Any, full_model: Any, low: float, high: float,
+                 full_seconds_per_sample: Optional[float] = None):
+        if list(fast_model.feature_names) != list(full_model.feature_names):
+            raise ValueError("Fast and full models must be trained on the same features.")
+        self.fast_model = fast_model
+        self.full_model = full_model
+        self.low = low
+        self.high = high
+        self.full_seconds_per_sample = full_seconds_per_sample
+        self.feature_names = full_model.feature_names
+        self.classes = full_model.classes
+        self._lock = threading.Lock()
+        self._samples = 0
+        self._escalated = 0
+        self._fast_seconds = 0.0
+        self._full_seconds = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.fast_model.nbytes + self.full_model.nbytes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        probabilities = self.fast_model.predict_proba(X)
+        fast_seconds = time.perf_counter() - start
+
+        positive = probabilities[:, list(self.fast_model.classes).index(1)]
+        uncertain = (positive > self.low) & (positive < self.high)
+        full_seconds = 0.0
+        if uncertain.any():
+            start = time.perf_counter()
+            probabilities[uncertain] = self.full_model.predict_proba(X[uncertain])
+            full_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self._samples += len(X)
+            self._escalated += int(uncertain.sum())
+            self._fast_seconds += fast_seconds
+            self._full_seconds += full_seconds
+        return probabilities
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Escalation rate and net latency saved: the full-model time avoided on samples that
+        were not escalated, minus the fast-model time paid on every sample. The full-model
+        cost per sample is the live one once MIN_LIVE_ESCALATIONS samples were escalated,
+        and the one measured at calibration before that.
+        """
+        with self._lock:
+            samples, escalated = self._samples, self._escalated
+            fast_seconds, full_seconds = self._fast_seconds, self._full_seconds
+        if escalated >= MIN_LIVE_ESCALATIONS or self.full_seconds_per_sample is None:
+            full_per_sample = full_seconds / escalated if escalated else 0.0
+        else:
+            full_per_sample = self.full_seconds_per_sample
+        return {
+            "band": [self.low, self.high],
+            "samples": samples,
+            "escalated": escalated,
+            "escalation_rate": escalated / samples if samples else 0.0,
+            "fast_model_seconds": fast_seconds,
+            "full_model_seconds": full_seconds,
+            "full_seconds_per_sample": full_per_sample,
+            "latency_saved_seconds": (samples - escalated) * full_per_sample - fast_seconds,
+        }
+
+
+def load_cascade(full_model: Any, config_path: str = CASCADE_CONFIG_PATH, mmap: bool = False) -> CascadeModel:
+    """Wraps full_model in the cascade described by config_path (written by calibrate())."""
+    with open(config_path) as f:
+        config = json.load(f)
+    fast_model = load_model_arrays(config["fast_model"], mmap=mmap)
+    return CascadeModel(fast_model, full_model, config["low"], config["high"],
+                        config.get("full_seconds_per_sample"))
+
+
+def choose_band(fast_positive: np.ndarray, full_predictions: np.ndarray,
+                target_agreement: float = TARGET_AGREEMENT) -> Tuple[float, float, float, float]:
+    """
+    Returns (low, high, agreement, escalation_rate) for the band with the lowest
+    escalation rate whose cascade predictions agree with full_predictions on at
+    least target_agreement of the samples.
+    """
+    fast_predictions = (fast_positive >= 0.5).astype(full_predictions.dtype)
+    disagree = fast_predictions != full_predictions
+    n = len(fast_positive)
+    total_disagree = int(np.count_nonzero(disagree))
+
+    # Prefix counts over the samples sorted by probability: the samples escalated by
+    # (low, high) are the contiguous slice sorted_positive[a:b].
+    order = np.argsort(fast_positive, kind="stable")
+    sorted_positive = fast_positive[order]
+    prefix_disagree = np.concatenate([[0], np.cumsum(disagree[order])])
+
+    lows = np.unique(np.concatenate([[0.0, 0.5], fast_positive[fast_positive <= 0.5]]))
+    highs = np.unique(np.concatenate([[0.5, 1.0], fast_positive[fast_positive >= 0.5]]))
+    starts = np.searchsorted(sorted_positive, lows, side="right")    # first sample with p > low
+    ends = np.searchsorted(sorted_positive, highs, side="left")      # first sample with p >= high
+
+    best = None
+    j = 0
+    for low, a in zip(lows, starts):
+        # Escalated samples take the forest's answer, so only confident ones can disagree.
+        # Raising low removes escalated samples, so the smallest sufficient high never
+        # moves down: one forward pass over highs serves every low.
+        while j < len(highs):
+            agreement = 1.0 - (total_disagree - (prefix_disagree[max(ends[j], a)] - prefix_disagree[a])) / n
+            if agreement >= target_agreement:
+                break
+            j += 1
+        if j == len(highs):
+            break
+        escalation_rate = max(int(ends[j]) - int(a), 0) / n
+        candidate = (escalation_rate, -agreement, float(low), float(highs[j]))
+        if best is None or candidate < best:
+            best = candidate
+
+    if best is None:
+        raise ValueError(f"No band reaches {target_agreement:.2%} agreement.")
+    escalation_rate, agreement, low, high = best
+    return low, high, -agreement, escalation_rate
+
+
+def calibrate(full_arrays_path: str, fast_arrays_path: str = FAST_MODEL_ARRAYS_PATH,
+              X_path: str = X_TEST_PATH, config_path: str = CASCADE_CONFIG_PATH,
+              target_agreement: float = TARGET_AGREEMENT) -> Dict[str, Any]:
+    """Picks the uncertainty band on X_path and writes the cascade config."""
+    import pandas as pd
+
+    full_model = load_model_arrays(full_arrays_path)
+    fast_model = load_model_arrays(fast_arrays_path)
+    X = pd.read_csv(X_path)[full_model.feature_names].to_numpy()
+
+    full_predictions = full_model.predict(X)
+    fast_positive = fast_model.predict_proba(X)[:, list(fast_model.classes).index(1)]
+    low, high, agreement, escalation_rate = choose_band(fast_positive, full_predictions, target_agreement)
+
+    # Measure the per-sample cost of each stage on the same data
+    start = time.perf_counter()
+    fast_model.predict_proba(X)
+    fast_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    full_model.predict_proba(X)
+    full_seconds = time.perf_counter() - start
+    cascade_seconds = fast_seconds + escalation_rate * full_seconds
+    # Serving scores one request at a time, so time the full model the same way for stats()
+    start = time.perf_counter()
+    for row in X[:COST_SAMPLE_ROWS]:
+        full_model.predict_proba(row[np.newaxis, :])
+    full_seconds_per_sample = (time.perf_counter() - start) / min(len(X), COST_SAMPLE_ROWS)
+
+    config = {
+        "fast_model": fast_arrays_path,
+        "low": low,
+        "high": high,
+        "target_agreement": target_agreement,
+        "agreement": agreement,
+        "escalation_rate": escalation_rate,
+        "expected_latency_saved": 1.0 - cascade_seconds / full_seconds,
+        "full_seconds_per_sample": full_seconds_per_sample,
+    }
+    os.makedirs(os.path.dirname(config_path) or ".", exist_ok=True)
+    with open(config_path, "w") as f:
+        json.dump(config, f, indent=2)
+    logging.info(
+        f"Cascade band ({low:.4f}, {high:.4f}): agreement {agreement:.2%}, "
+        f"escalation rate {escalation_rate:.2%}, expected latency saved {config['expected_latency_saved']:.2%}"
+    )
+    logging.info(f"Saved cascade config into {config_path}")
+    return config
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    calibrate(MODEL_ARRAYS_PATH)
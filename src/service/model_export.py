@@ -0,0 +1,130 @@
+# --- src/service/model_export.py ---
+# Admin tool: converts a joblib-pickled scikit-learn model into the flat NumPy
+# arrays served by src/service/runtime.py, and checks that both give the same answers.
+#
+# Usage (from the project root):
+#   python -m src.service.model_export
+import os
+import logging
+from typing import Any, Dict
+
+import numpy as np
+
+from src.service.runtime import FINAL_FEATURE_COLS, load_model_arrays
+
+MODEL_PATH = os.path.join('models', 'final_model.joblib')
+MODEL_ARRAYS_PATH = os.path.join('models', 'final_model.npz')
+# Cheap first-stage model for cascade serving (see cascade.py)
+FAST_MODEL_PATH = os.path.join('models', 'fast_model.joblib')
+FAST_MODEL_ARRAYS_PATH = os.path.join('models', 'fast_model.npz')
+X_TEST_PATH = os.path.join('data', 'final', 'X_test.csv')
+
+
+def export_tree_model(model: Any) -> Dict[str, np.ndarray]:
+    """
+    Flattens a fitted DecisionTreeClassifier or RandomForestClassifier into one
+    concatenated node table (see ForestArrays for the layout).
+    """
+    estimators = getattr(model, "estimators_", [model])
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        # Leaves point to themselves so traversal can run a fixed number of steps
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        counts = tree.value[:, 0, :]
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+        max_depth = max(max_depth, tree.max_depth)
+        offset += tree.node_count
+
+    feature_names = getattr(model, "feature_names_in_", FINAL_FEATURE_COLS)
+    return {
+        "kind": np.array("forest"),
+        "feature_names": np.array([str(name) for name in feature_names]),
+        "classes": np.asarray(model.classes_),
+        "roots": np.array(roots, dtype=np.int64),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "feature": np.concatenate(feature).astype(np.int64),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "max_depth": np.array(max_depth),
+    }
+
+
+def export_linear_model(model: Any) -> Dict[str, np.ndarray]:
+    """
+    Exports a binary LogisticRegression, optionally wrapped in a Pipeline behind a
+    StandardScaler; the scaler is folded into the weights.
+    """
+    steps = [step for _, step in model.steps] if hasattr(model, "steps") else [model]
+    classifier = steps[-1]
+    coef = classifier.coef_[0].astype(np.float64)
+    intercept = float(classifier.intercept_[0])
+    for step in steps[:-1]:
+        if not hasattr(step, "scale_"):
+            raise ValueError(f"Cannot export pipeline step {type(step).__name__}")
+        coef = coef / step.scale_
+        intercept -= float(np.dot(coef, step.mean_))
+
+    feature_names = getattr(model, "feature_names_in_", FINAL_FEATURE_COLS)
+    return {
+        "kind": np.array("linear"),
+        "feature_names": np.array([str(name) for name in feature_names]),
+        "classes": np.asarray(classifier.classes_),
+        "coef": coef,
+        "intercept": np.array(intercept),
+    }
+
+
+def export_arrays(model: Any) -> Dict[str, np.ndarray]:
+    """Picks the exporter matching the fitted model."""
+    if hasattr(model, "estimators_") or hasattr(model, "tree_"):
+        return export_tree_model(model)
+    return export_linear_model(model)
+
+
+def save_model_arrays(arrays: Dict[str, np.ndarray], path: str):
+    # Stored uncompressed: load time matters more than a few hundred KB on disk
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, **arrays)
+    logging.info(f"Saved model arrays into {path}")
+
+
+def check_parity(model: Any, arrays_path: str, X_path: str = X_TEST_PATH) -> float:
+    """Returns the fraction of X_path rows on which the exported arrays agree with the model."""
+    import pandas as pd
+
+    X = pd.read_csv(X_path)
+    runtime_model = load_model_arrays(arrays_path)
+    expected = model.predict(X[runtime_model.feature_names])
+    actual = runtime_model.predict(X[runtime_model.feature_names].to_numpy())
+    agreement = float(np.mean(expected == actual))
+    logging.info(f"Exported arrays agree with the reference model on {agreement:.2%} of {X_path}")
+    return agreement
+
+
+def export_model(model_path: str = MODEL_PATH, arrays_path: str = MODEL_ARRAYS_PATH):
+    import joblib
+
+    model = joblib.load(model_path)
+    save_model_arrays(export_arrays(model), arrays_path)
+    if os.path.exists(X_TEST_PATH):
+        agreement = check_parity(model, arrays_path)
+        if agreement < 1.0:
+            os.remove(arrays_path)
+            raise RuntimeError(f"Exported arrays disagree with {model_path}; refusing to serve them.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    export_model()
+    if os.path.exists(FAST_MODEL_PATH):
+        export_model(FAST_MODEL_PATH, FAST_MODEL_ARRAYS_PATH)
@@ -1,112 +1,303 @@
-import pandas as pd
-import joblib
 import os
+import time
+import hashlib
 import logging
-from typing import Dict, Any, List
-import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 
+import numpy as np
 
-# This allows imports like 'from src.features...' to work
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+# 🌟 The request path only needs NumPy and the exported model arrays.
+# pandas / scikit-learn / joblib are imported lazily, on the reference path only.
+from src.service.runtime import engineer_features, load_model_arrays
+from src.service.cascade import load_cascade
+from src.service.audit import AuditSink, get_audit_sink
+from src.service.registry import MODEL_REGISTRY_PATH, load_registry
 
-# 🌟 IMPORT THE PURE FEATURE UTILITY
-# Assumes feature_utilities.py is in src/features/
-from src.features.feature_utilities import create_total_column_and_clean 
+# --- CONFIGURATION ---
+# Request field that selects the registered model (e.g. "red", "white"); the default model is used if absent
+MODEL_ROUTING_FIELD = "wine_type"
+# Upper bound on the model arrays kept loaded; least recently used models are evicted above it
+MODEL_POOL_MEMORY_MB = float(os.environ.get("MODEL_POOL_MEMORY_MB", "512"))
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# --- CONFIGURATION (Must match your pipeline's global constants) ---
-MODEL_PATH = os.path.join('models', 'final_model.joblib')
+class PooledModel:
+    """A loaded model of the pool: runtime arrays (or cascade), version and lazy reference model."""
+    def __init__(self, name: str, entry: Dict[str, Any], model: Any, version: str):
+        self.name = name
+        self.entry = entry
+        self.model = model
+        self.version = version
+        self._reference_model = None
 
-# Columns used for feature engineering
-ACIDITY_COLS: List[str] = ["fixed acidity", "volatile acidity"]
-SULFUR_COLS: List[str] = ["free sulfur dioxide", "total sulfur dioxide"]
+    @property
+    def nbytes(self) -> int:
+        return self.model.nbytes
 
-# The list of FINAL features expected by your trained model (Order is CRUCIAL!)
-# You must generate this list after your build_features.py pipeline runs successfully
-FINAL_FEATURE_COLS: List[str] = [
-    'citric acid', 'residual sugar', 'chlorides', 'density', 'pH', 
-    'sulphates', 'alcohol', 'total acidity', 'sulphur bound' 
-    # Example order: Original columns that remain, followed by your two new calculated columns
-]
+    @property
+    def reference_model(self):
+        """The original scikit-learn model. Admin/reference use only: imports joblib."""
+        if self._reference_model is None:
+            if "model" not in self.entry:
+                raise RuntimeError(f"Model '{self.name}' has no reference model in the registry.")
+            import joblib
+            self._reference_model = joblib.load(self.entry["model"])
+        return self._reference_model
 
 
 class ModelPredictor:
     """
-    Manages loading artifacts and running the end-to-end prediction pipeline.
+    Registry-backed pool of models served from one process, routed by the
+    MODEL_ROUTING_FIELD of each request.
+
+    Models are loaded on first use with their arrays memory-mapped, so all worker
+    processes share one copy per model. When the loaded arrays exceed the memory cap,
+    the least recently used models are evicted (and reloaded on their next request).
     """
-    def __init__(self):
-        self.model = None
-        self.scaler = None
-        self._load_artifacts()
+    def __init__(self, registry_path: str = MODEL_REGISTRY_PATH, memory_cap_mb: float = MODEL_POOL_MEMORY_MB,
+                 audit_sink: Optional[AuditSink] = None):
+        try:
+            self.registry = load_registry(registry_path)
+        except (OSError, ValueError) as e:
+            # ValueError also covers malformed JSON; the API reports the service as down
+            logging.error(f"Failed to load model registry: {e}")
+            raise RuntimeError(f"Model registry {registry_path} could not be loaded. Deployment cannot proceed.")
+        self.default_model = self.registry["default"]
+        self.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+        self.audit_sink = audit_sink
+        self._models: "OrderedDict[str, PooledModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per model, so a slow load never blocks requests for models already in the pool
+        self._load_locks = {name: threading.Lock() for name in self.registry["models"]}
+        self._usage: Dict[str, Dict[str, float]] = {
+            name: {"requests": 0, "seconds": 0.0, "max_seconds": 0.0, "loads": 0, "evictions": 0}
+            for name in self.registry["models"]
+        }
+        # Fail fast (the API reports the service as down) if the default model cannot be loaded
+        self.get_model(self.default_model)
+
+    @property
+    def model_names(self) -> List[str]:
+        return list(self.registry["models"])
+
+    def get_model(self, name: Optional[str] = None) -> PooledModel:
+        """Returns the named (or default) model, loading it into the pool if needed."""
+        name = name or self.default_model
+        if name not in self.registry["models"]:
+            raise ValueError(f"Unknown model '{name}'. Available models: {', '.join(self.model_names)}")
 
-    def _load_artifacts(self):
-        """Loads the trained model and the fitted scaler using joblib."""
+        pooled = self._pooled(name)
+        if pooled is not None:
+            return pooled
+        with self._load_locks[name]:
+            # Another request may have loaded it while we waited
+            pooled = self._pooled(name)
+            if pooled is not None:
+                return pooled
+            pooled = self._load_model(name)
+            with self._lock:
+                self._models[name] = pooled
+                self._usage[name]["loads"] += 1
+                self._evict()
+            return pooled
+
+    def _pooled(self, name: str) -> Optional[PooledModel]:
+        """The loaded model (marked as most recently used), or None if it is not in the pool."""
+        with self._lock:
+            pooled = self._models.get(name)
+            if pooled is not None:
+                self._models.move_to_end(name)
+            return pooled
+
+    def _evict(self):
+        """Drops least recently used models until the pool fits the memory cap (always keeps one)."""
+        while len(self._models) > 1 and sum(p.nbytes for p in self._models.values()) > self.memory_cap_bytes:
+            name, pooled = self._models.popitem(last=False)
+            self._usage[name]["evictions"] += 1
+            logging.info(f"Evicted model '{name}' ({pooled.nbytes / 1e6:.1f} MB) from the pool.")
+
+    def _load_model(self, name: str) -> PooledModel:
+        """
+        Loads the exported model arrays, falling back to converting the entry's own joblib
+        model (never another model's: a missing 'white' must not be served by the red forest).
+        """
+        entry = self.registry["models"][name]
         try:
-            self.model = joblib.load(MODEL_PATH)
-            logging.info("Model and Scaler artifacts loaded successfully.")
-        except FileNotFoundError as e:
-            logging.error(f"Failed to load artifact: {e}")
-            raise RuntimeError("Required model or scaler file not found. Deployment cannot proceed.")
+            model = load_model_arrays(entry["arrays"], mmap=True)
+            version = _file_version(entry["arrays"])
+            logging.info(f"Model '{name}' loaded successfully from {entry['arrays']} (version {version}).")
+        except FileNotFoundError:
+            if "model" not in entry:
+                logging.error(f"Failed to load artifact: {entry['arrays']} not found")
+                raise RuntimeError(f"Required model file for '{name}' not found. Deployment cannot proceed.")
+            model_path = entry["model"]
+            logging.warning(f"{entry['arrays']} not found, converting {model_path} in-process (slow start).")
+            try:
+                import joblib
+                from src.service.model_export import export_arrays
+                from src.service.runtime import MODEL_KINDS
+
+                arrays = export_arrays(joblib.load(model_path))
+                model = MODEL_KINDS[str(arrays.pop("kind"))](arrays)
+                version = _file_version(model_path)
+            except (FileNotFoundError, ImportError) as e:
+                logging.error(f"Failed to load artifact: {e}")
+                raise RuntimeError(f"Required model file for '{name}' not found. Deployment cannot proceed.")
+        except (OSError, ValueError) as e:
+            # e.g. a read-only models/ whose arrays were not unpacked at build time (registry.py), or a corrupt file
+            logging.error(f"Failed to load artifact {entry['arrays']}: {e}")
+            raise RuntimeError(f"Model file for '{name}' could not be loaded. Deployment cannot proceed.")
 
-    def _feature_engineer(self, data_df: pd.DataFrame) -> pd.DataFrame:
+        # 🌟 Serve through the cheap-model-first cascade once it has been calibrated
+        # A broken cascade (missing fast model, bad config, feature mismatch) only costs the
+        # speed-up: the full model alone gives the reference answers
+        if entry.get("cascade") and os.path.exists(entry["cascade"]):
+            try:
+                model = load_cascade(model, entry["cascade"], mmap=True)
+                logging.info(f"Cascade serving enabled for '{name}' with band ({model.low:.4f}, {model.high:.4f}).")
+            except (OSError, KeyError, TypeError, ValueError) as e:
+                logging.error(f"Failed to load cascade {entry['cascade']} for '{name}', serving the full model only: {e}")
+        return PooledModel(name, entry, model, version)
+
+    def _feature_engineer(self, pooled: PooledModel, records: List[Dict[str, Any]]) -> np.ndarray:
         """
-        Applies the exact same feature engineering steps used during training 
-        by calling the imported utility function.
+        Applies the exact same feature engineering steps used during training
+        and returns the features in the model's expected column order.
         """
-        data_df = data_df.copy()
-        
-        # 1. Create Total Acidity
-        data_df = create_total_column_and_clean(data_df, ACIDITY_COLS, "total acidity")
-        
-        # 2. Create Sulphur Bound
-        data_df = create_total_column_and_clean(data_df, SULFUR_COLS, "sulphur bound")
-        
-        # 3. Final Step: Select and reorder columns to match the model's expected input
         try:
-            return data_df[FINAL_FEATURE_COLS]
-        except KeyError as e:
-             logging.error(f"Missing feature in input data: {e}")
-             raise ValueError(f"Input data is missing expected feature: {e}")
+            return engineer_features(records, pooled.model.feature_names)
+        except ValueError as e:
+            logging.error(f"Missing feature in input data: {e}")
+            raise
+
+    def _route(self, raw_data: Dict[str, Any], model_name: Optional[str]) -> PooledModel:
+        return self.get_model(model_name or raw_data.get(MODEL_ROUTING_FIELD))
 
-    def predict(self, raw_data: Dict[str, Any]) -> int:
+    def predict_proba(self, raw_data: Dict[str, Any], model_name: Optional[str] = None) -> float:
+        """Returns the probability that the wine is of HIGH quality (class 1)."""
+        pooled = self._route(raw_data, model_name)
+        probabilities = pooled.model.predict_proba(self._feature_engineer(pooled, [raw_data]))[0]
+        return float(probabilities[list(pooled.model.classes).index(1)])
+
+    def predict(self, raw_data: Dict[str, Any], model_name: Optional[str] = None) -> int:
         """
-        Takes raw input (from the API), preprocesses it, and returns the prediction.
+        Takes raw input (from the API), preprocesses it, and returns the prediction
+        of the model selected by model_name or by the request's MODEL_ROUTING_FIELD.
         """
-        # 1. Convert raw input dictionary to a pandas DataFrame (1 row)
-        input_df = pd.DataFrame([raw_data])
-        
-        # 2. Feature Engineering (using the reusable logic)
-        engineered_df = self._feature_engineer(input_df)
-        
-        # 3. Scaling (Using the fitted scaler's .transform())
-        # The output is a NumPy array
-        #scaled_features = self.scaler.transform(engineered_df)
-        
-        # 4. Prediction
-        prediction = self.model.predict(engineered_df)
-        
+        pooled = self._route(raw_data, model_name)
+        start = time.perf_counter()
+        features = self._feature_engineer(pooled, [raw_data])
+        probabilities = pooled.model.predict_proba(features)[0]
+        prediction = int(pooled.model.classes[probabilities.argmax()])
+        latency = time.perf_counter() - start
+
+        usage = self._usage[pooled.name]
+        with self._lock:
+            usage["requests"] += 1
+            usage["seconds"] += latency
+            usage["max_seconds"] = max(usage["max_seconds"], latency)
+
+        # Audit trail: only an in-memory enqueue here, the sink writes in the background
+        if self.audit_sink is not None:
+            positive = float(probabilities[list(pooled.model.classes).index(1)])
+            self.audit_sink.record(raw_data, pooled.model.feature_names, features[0],
+                                   f"{pooled.name}@{pooled.version}", positive, prediction, latency)
+
         # Return the prediction as a standard Python integer
-        return int(prediction[0])
+        return prediction
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model latency and memory accounting, plus cascade and audit statistics."""
+        with self._lock:
+            loaded = dict(self._models)
+            usage = {name: dict(values) for name, values in self._usage.items()}
+
+        models = {}
+        for name in self.model_names:
+            requests = usage[name]["requests"]
+            model_stats = {
+                "loaded": name in loaded,
+                "requests": requests,
+                "mean_latency_ms": 1000.0 * usage[name]["seconds"] / requests if requests else 0.0,
+                "max_latency_ms": 1000.0 * usage[name]["max_seconds"],
+                "loads": usage[name]["loads"],
+                "evictions": usage[name]["evictions"],
+            }
+            if name in loaded:
+                pooled = loaded[name]
+                model_stats.update({"kind": pooled.model.kind, "version": pooled.version, "memory_bytes": pooled.nbytes})
+                if hasattr(pooled.model, "stats"):
+                    model_stats[pooled.model.kind] = pooled.model.stats()
+            models[name] = model_stats
+
+        stats = {
+            "default_model": self.default_model,
+            "memory_cap_bytes": self.memory_cap_bytes,
+            "memory_bytes": sum(p.nbytes for p in loaded.values()),
+            "models": models,
+        }
+        if self.audit_sink is not None:
+            stats["audit"] = self.audit_sink.stats()
+        return stats
+
+    def predict_reference(self, raw_data: Dict[str, Any], model_name: Optional[str] = None) -> int:
+        """Same as predict(), but through the original scikit-learn model (for parity checks)."""
+        import pandas as pd
+
+        pooled = self._route(raw_data, model_name)
+        features = self._feature_engineer(pooled, [raw_data])
+        frame = pd.DataFrame(features, columns=pooled.model.feature_names)
+        return int(pooled.reference_model.predict(frame)[0])
+
+
+def _file_version(path: str) -> str:
+    """Short content hash of a model file, recorded with every audited prediction."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+# --- Lazily Instantiated Predictor ---
+# Artifacts are loaded ONLY ONCE, on first use, instead of as an import side effect.
+# A failed load is remembered and only retried after PREDICTOR_RETRY_SECONDS.
+PREDICTOR_RETRY_SECONDS = float(os.environ.get("PREDICTOR_RETRY_SECONDS", "30"))
+_predictor: Optional[ModelPredictor] = None
+_predictor_failed_at: Optional[float] = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor() -> Optional[ModelPredictor]:
+    """Returns the shared ModelPredictor, or None if the model artifacts failed to load."""
+    global _predictor, _predictor_failed_at
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is not None:
+                return _predictor
+            if _predictor_failed_at is not None and time.monotonic() - _predictor_failed_at < PREDICTOR_RETRY_SECONDS:
+                return None
+            try:
+                _predictor = ModelPredictor(audit_sink=get_audit_sink())
+                _predictor_failed_at = None
+            except RuntimeError:
+                _predictor_failed_at = time.monotonic()
+                logging.error(f"Model predictor failed to initialize, retrying in {PREDICTOR_RETRY_SECONDS:.0f}s.")
+                return None
+    return _predictor
 
-# --- Instantiate the Predictor Globally ---
-# This loads artifacts ONLY ONCE when the service starts
-try:
-    predictor = ModelPredictor()
-except RuntimeError:
-    predictor = None 
 
 # --- Example Usage (If running script directly) ---
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
     # NOTE: All 11 original columns must be present in the input dictionary!
     sample_input = {
-        "fixed acidity": 7.4, "volatile acidity": 0.70, "citric acid": 0.00, 
-        "residual sugar": 1.9, "chlorides": 0.076, "free sulfur dioxide": 11.0, 
-        "total sulfur dioxide": 34.0, "density": 0.9978, "pH": 3.51, 
+        "fixed acidity": 7.4, "volatile acidity": 0.70, "citric acid": 0.00,
+        "residual sugar": 1.9, "chlorides": 0.076, "free sulfur dioxide": 11.0,
+        "total sulfur dioxide": 34.0, "density": 0.9978, "pH": 3.51,
         "sulphates": 0.56, "alcohol": 9.4
     }
-    
+
+    predictor = get_predictor()
     if predictor:
         result = predictor.predict(sample_input)
-        print(f"\nPrediction Result: {result} (0=Poor/Average, 1=Good/Average)")
\ No newline at end of file
+        print(f"\nPrediction Result: {result} (0=Poor/Average, 1=Good/Average)")
@@ -0,0 +1,90 @@
+# --- src/service/registry.py ---
+# Registry of the named models served by one process (red, white, regional variants...).
+#
+# models/registry.json:
+#   {
+#     "default": "red",
+#     "models": {
+#       "red":   {"arrays": "models/final_model.npz", "model": "models/final_model.joblib",
+#                 "cascade": "models/cascade.json"},
+#       "white": {"arrays": "models/white/final_model.npz"}
+#     }
+#   }
+# "arrays" is required; "model" (joblib reference) and "cascade" (see cascade.py) are optional.
+#
+# Served arrays are memory-mapped from .npy files unpacked next to each .npz. Unpack every
+# registered model ahead of time (at image build, so models/ can be mounted read-only):
+#   python -m src.service.registry
+import os
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from src.service.runtime import load_model_arrays
+from src.service.cascade import CASCADE_CONFIG_PATH
+from src.service.model_export import MODEL_ARRAYS_PATH, MODEL_PATH
+
+MODEL_REGISTRY_PATH = os.path.join('models', 'registry.json')
+DEFAULT_MODEL_NAME = "red"
+
+
+def default_registry() -> Dict[str, Any]:
+    """Single-model registry used when no registry file exists (the original red wine model)."""
+    entry = {"arrays": MODEL_ARRAYS_PATH, "model": MODEL_PATH}
+    if os.path.exists(CASCADE_CONFIG_PATH):
+        entry["cascade"] = CASCADE_CONFIG_PATH
+    return {"default": DEFAULT_MODEL_NAME, "models": {DEFAULT_MODEL_NAME: entry}}
+
+
+def load_registry(path: str = MODEL_REGISTRY_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return default_registry()
+    with open(path) as f:
+        registry = json.load(f)
+    if not isinstance(registry, dict) or not isinstance(registry.get("models"), dict) or not registry["models"]:
+        raise ValueError(f"Model registry {path} does not define any models.")
+    for name, entry in registry["models"].items():
+        if not isinstance(entry, dict) or "arrays" not in entry:
+            raise ValueError(f"Model '{name}' in {path} has no 'arrays' path.")
+    registry.setdefault("default", next(iter(registry["models"])))
+    if registry["default"] not in registry["models"]:
+        raise ValueError(f"Default model '{registry['default']}' is not registered in {path}.")
+    return registry
+
+
+def register_model(name: str, arrays_path: str, model_path: Optional[str] = None,
+                   cascade_path: Optional[str] = None, default: bool = False,
+                   path: str = MODEL_REGISTRY_PATH):
+    """Adds or replaces a model entry in the registry file."""
+    registry = load_registry(path) if os.path.exists(path) else {"models": {}}
+    entry = {"arrays": arrays_path}
+    if model_path:
+        entry["model"] = model_path
+    if cascade_path:
+        entry["cascade"] = cascade_path
+    registry["models"][name] = entry
+    if default or "default" not in registry:
+        registry["default"] = name
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(registry, f, indent=2)
+    logging.info(f"Registered model '{name}' ({arrays_path}) in {path}")
+
+
+def unpack_models(path: str = MODEL_REGISTRY_PATH):
+    """Unpacks the arrays of every registered model (and cascade fast model) for memory-mapping."""
+    registry = load_registry(path)
+    for name, entry in registry["models"].items():
+        arrays_paths = [entry["arrays"]]
+        if entry.get("cascade") and os.path.exists(entry["cascade"]):
+            with open(entry["cascade"]) as f:
+                arrays_paths.append(json.load(f)["fast_model"])
+        for arrays_path in arrays_paths:
+            load_model_arrays(arrays_path, mmap=True)
+            logging.info(f"Unpacked {arrays_path} for model '{name}'")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    unpack_models()
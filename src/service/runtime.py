@@ -0,0 +1,171 @@
+# --- src/service/runtime.py ---
+# NumPy-only inference runtime used on the request path.
+# Nothing in this module may import pandas, scikit-learn or joblib: the serving
+# container only needs NumPy and the exported model arrays (see model_export.py).
+import os
+import shutil
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# Columns used for feature engineering (must match build_features.py)
+ACIDITY_COLS: List[str] = ["fixed acidity", "volatile acidity"]
+SULFUR_COLS: List[str] = ["free sulfur dioxide", "total sulfur dioxide"]
+
+# Engineered columns and the raw columns they are summed from
+DERIVED_FEATURES: Dict[str, List[str]] = {
+    "total acidity": ACIDITY_COLS,
+    "sulphur bound": SULFUR_COLS,
+}
+
+# The list of FINAL features expected by the trained model (Order is CRUCIAL!)
+FINAL_FEATURE_COLS: List[str] = [
+    'citric acid', 'residual sugar', 'chlorides', 'density', 'pH',
+    'sulphates', 'alcohol', 'total acidity', 'sulphur bound'
+]
+
+
+def engineer_features(records: Sequence[Dict[str, Any]], feature_names: Sequence[str] = FINAL_FEATURE_COLS) -> np.ndarray:
+    """
+    NumPy port of create_total_column_and_clean(): builds the engineered feature
+    matrix (one row per record) in the column order the model was trained on.
+    """
+    matrix = np.empty((len(records), len(feature_names)), dtype=np.float64)
+    for i, record in enumerate(records):
+        for j, name in enumerate(feature_names):
+            try:
+                if name in DERIVED_FEATURES:
+                    first, second = DERIVED_FEATURES[name][:2]
+                    matrix[i, j] = float(record[first]) + float(record[second])
+                else:
+                    matrix[i, j] = float(record[name])
+            except KeyError as e:
+                raise ValueError(f"Input data is missing expected feature: {e}")
+    return matrix
+
+
+class ForestArrays:
+    """
+    Flat-array representation of a fitted scikit-learn decision tree or random forest.
+
+    All trees are concatenated into one node table. Leaves point to themselves, so
+    every sample can be pushed through every tree with a fixed number of vectorised
+    steps (the maximum tree depth) instead of a Python loop per node.
+    """
+    kind = "forest"
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.feature_names: List[str] = [str(name) for name in arrays["feature_names"]]
+        self.classes = arrays["classes"]
+        self.roots = arrays["roots"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.max_depth = int(arrays["max_depth"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.roots, self.left, self.right, self.feature, self.threshold, self.value))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        # scikit-learn evaluates trees on float32 inputs; cast the same way so the
+        # split decisions (and therefore the predictions) are identical.
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class LinearArrays:
+    """
+    Weights of a fitted binary LogisticRegression. A StandardScaler in front of it
+    is folded into the weights at export time, so inference is a single dot product.
+    """
+    kind = "linear"
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.feature_names: List[str] = [str(name) for name in arrays["feature_names"]]
+        self.classes = arrays["classes"]
+        self.coef = arrays["coef"]
+        self.intercept = float(arrays["intercept"])
+
+    @property
+    def nbytes(self) -> int:
+        return self.coef.nbytes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        positive = 1.0 / (1.0 + np.exp(-(np.asarray(X, dtype=np.float64) @ self.coef + self.intercept)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# Maps the 'kind' stored in an exported .npz file to its runtime class
+MODEL_KINDS = {
+    ForestArrays.kind: ForestArrays,
+    LinearArrays.kind: LinearArrays,
+}
+
+
+def _mmap_dir(path: str) -> str:
+    """
+    Unpacks the .npz into one .npy file per array (once per model file version) and
+    returns the directory. Members of an .npz cannot be memory-mapped, .npy files can.
+    """
+    stat = os.stat(path)
+    target = f"{path}.{stat.st_mtime_ns}-{stat.st_size}.mmap"
+    if os.path.isdir(target):
+        return target
+
+    tmp = f"{target}.tmp-{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    with np.load(path, allow_pickle=False) as npz:
+        for key in npz.files:
+            np.save(os.path.join(tmp, f"{key}.npy"), npz[key])
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        # Another worker unpacked the same version first; use theirs
+        shutil.rmtree(tmp, ignore_errors=True)
+        return target
+
+    # Drop directories unpacked from older versions of the same file
+    prefix = os.path.basename(path) + "."
+    parent = os.path.dirname(path) or "."
+    for name in os.listdir(parent):
+        if name.startswith(prefix) and name.endswith(".mmap") and os.path.join(parent, name) != target:
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+    return target
+
+
+def load_model_arrays(path: str, mmap: bool = False):
+    """
+    Loads an exported model (.npz written by model_export.py) without pickle.
+
+    With mmap=True the arrays are memory-mapped read-only, so every worker process
+    serving the same model shares one copy in the OS page cache.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model arrays not found at {path}")
+    if mmap:
+        directory = _mmap_dir(path)
+        arrays = {
+            name[:-len(".npy")]: np.load(os.path.join(directory, name), mmap_mode="r", allow_pickle=False)
+            for name in os.listdir(directory) if name.endswith(".npy")
+        }
+    else:
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {key: npz[key] for key in npz.files}
+    kind = str(arrays.pop("kind"))
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unsupported model kind '{kind}' in {path}")
+    return MODEL_KINDS[kind](arrays)
@@ -0,0 +1,110 @@
+# --- src/service/startup_benchmark.py ---
+# Cold-start benchmark and import-time budget for the serving runtime.
+#
+# Each run imports the Flask app in a fresh interpreter (like a new container or
+# gunicorn worker), then loads the model and serves one prediction. The check fails
+# if the median import time exceeds the budget, if a heavy library is pulled in, or
+# if any run could not load the model or serve the prediction.
+#
+# Usage (from the project root):
+#   python -m src.service.startup_benchmark            # enforce the budget
+#   IMPORT_BUDGET_SECONDS=0.5 python -m src.service.startup_benchmark
+import os
+import sys
+import json
+import logging
+import statistics
+import subprocess
+from typing import Dict, List
+
+APP_MODULE = "src.api.app"
+RUNS = int(os.environ.get("STARTUP_BENCHMARK_RUNS", "5"))
+IMPORT_BUDGET_SECONDS = float(os.environ.get("IMPORT_BUDGET_SECONDS", "1.0"))
+
+# Libraries that must never be imported on the request path
+HEAVY_MODULES: List[str] = ["pandas", "sklearn", "joblib", "scipy", "matplotlib", "seaborn"]
+
+# Runs inside the fresh interpreter; prints one JSON line with the timings
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {app_module}
+t1 = time.perf_counter()
+from src.service.predictor import ModelPredictor
+# No audit sink: benchmark predictions must not end up in the compliance audit trail
+error = None
+try:
+    predictor = ModelPredictor(audit_sink=None)
+except RuntimeError as e:
+    predictor, error = None, str(e)
+t2 = time.perf_counter()
+predicted = False
+if predictor is not None:
+    try:
+        predictor.predict({sample!r})
+        predicted = True
+    except Exception as e:
+        error = f"{{type(e).__name__}}: {{e}}"
+t3 = time.perf_counter()
+print(json.dumps({{
+    "import_seconds": t1 - t0,
+    "model_load_seconds": t2 - t1 if predictor is not None else None,
+    "first_prediction_seconds": t3 - t2 if predicted else None,
+    "error": error,
+    "heavy_modules": sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r})),
+}}))
+"""
+
+SAMPLE_INPUT = {
+    "fixed acidity": 7.4, "volatile acidity": 0.70, "citric acid": 0.00,
+    "residual sugar": 1.9, "chlorides": 0.076, "free sulfur dioxide": 11.0,
+    "total sulfur dioxide": 34.0, "density": 0.9978, "pH": 3.51,
+    "sulphates": 0.56, "alcohol": 9.4
+}
+
+
+def run_probe() -> Dict:
+    probe = _PROBE.format(app_module=APP_MODULE, sample=SAMPLE_INPUT, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark(runs: int = RUNS) -> Dict:
+    results = [run_probe() for _ in range(runs)]
+
+    def median(key):
+        values = [r[key] for r in results if r[key] is not None]
+        return statistics.median(values) if values else None
+
+    return {
+        "runs": runs,
+        "import_seconds": median("import_seconds"),
+        "model_load_seconds": median("model_load_seconds"),
+        "first_prediction_seconds": median("first_prediction_seconds"),
+        "heavy_modules": sorted({name for r in results for name in r["heavy_modules"]}),
+        "errors": sorted({r["error"] for r in results if r["error"] is not None}),
+    }
+
+
+def check_budget(report: Dict, budget: float = IMPORT_BUDGET_SECONDS) -> bool:
+    ok = True
+    if report["import_seconds"] > budget:
+        logging.error(f"Import of {APP_MODULE} took {report['import_seconds']:.3f}s, budget is {budget:.3f}s")
+        ok = False
+    if report["heavy_modules"]:
+        logging.error(f"Heavy modules imported on the request path: {report['heavy_modules']}")
+        ok = False
+    # An image that cannot load its model or answer a request must not pass the gate
+    if report["errors"] or report["model_load_seconds"] is None or report["first_prediction_seconds"] is None:
+        logging.error(f"The model could not be loaded or did not serve a prediction: {report['errors']}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = benchmark()
+    logging.info(f"Startup benchmark: {json.dumps(report)}")
+    sys.exit(0 if check_budget(report) else 1)